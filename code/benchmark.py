@@ -0,0 +1,68 @@
+# -----------------------------------------
+#
+# benchmark.py
+#
+# quick benchmarks for the sprite code
+# run with: python benchmark.py
+#
+# Dustin Heyden
+# Oct 19, 2026
+#
+# -----------------------------------------
+
+from settings import *
+from sprites import Sprite, StaticSprite
+from groups import AllSprites
+from time import perf_counter
+import tracemalloc
+
+
+def sprite_memory(sprite_class, count = 10000):
+    surface = pygame.Surface((TILE_SIZE, TILE_SIZE))
+    group = pygame.sprite.Group()
+    collision_group = pygame.sprite.Group()
+
+    tracemalloc.start()
+    start = tracemalloc.get_traced_memory()[0]
+    sprites = [sprite_class((i * TILE_SIZE, 0), surface, (group, collision_group)) for i in range(count)]
+    end = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    return (end - start) / len(sprites)
+
+
+def memory():
+    print('bytes per tile sprite (incl. group membership)')
+    for sprite_class in (Sprite, StaticSprite):
+        print(f'  {sprite_class.__name__:<14}{sprite_memory(sprite_class):>8.0f}')
+
+
+# the draw loop as it was before batching, for comparison
+def draw_per_sprite(group, target_pos):
+    group.offset.x = -(target_pos[0] - WINDOW_WIDTH / 2)
+    group.offset.y = -(target_pos[1] - WINDOW_HEIGHT / 2)
+    group.display_surface.fill('black')
+    for sprite in sorted(group, key = lambda sprite: sprite.z):
+        offset_pos = sprite.rect.topleft + group.offset
+        group.display_surface.blit(sprite.image, offset_pos)
+
+
+def draw(count = 2000, frames = 200):
+    pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
+    surface = pygame.Surface((TILE_SIZE, TILE_SIZE))
+    group = AllSprites()
+    for i in range(count):
+        StaticSprite(((i % 40) * TILE_SIZE, (i // 40) * TILE_SIZE), surface, group)
+
+    print(f'draw time per sprite ({count} sprites)')
+    for name, draw_func in (('per sprite', draw_per_sprite), ('batched', AllSprites.draw)):
+        start = perf_counter()
+        for frame in range(frames):
+            draw_func(group, (WINDOW_WIDTH / 2 + frame, WINDOW_HEIGHT / 2))
+        elapsed = perf_counter() - start
+        print(f'  {name:<14}{elapsed / (frames * count) * 1e9:>8.0f} ns')
+
+
+if __name__ == '__main__':
+    memory()
+    draw()
@@ -0,0 +1,45 @@
+# -----------------------------------------
+#
+# collision.py
+#
+# swept collision along one axis
+# instead of moving first and fixing the overlap afterwards, find how far
+# a rect can travel before it hits something, so nothing can be skipped
+# over no matter how large the step is
+#
+# Dustin Heyden
+# Oct 19, 2026
+#
+# -----------------------------------------
+
+from settings import *
+
+# how far a rect may already overlap an obstacle and still count as
+# being in front of it (float error from earlier moves)
+EPSILON = 0.01
+
+
+# returns (distance the rect can move along axis, rect it hit or None).
+# only obstacles fully ahead of the rect block it, overlaps are left
+# to the regular collision code
+def sweep(rect, axis, distance, obstacles):
+    if not distance:
+        return 0, None
+
+    if axis == 'x':
+        path = rect.union(rect.move(distance, 0))
+    else:
+        path = rect.union(rect.move(0, distance))
+
+    hit = None
+    for index in path.collidelistall(obstacles):
+        obstacle = obstacles[index]
+        if axis == 'x':
+            gap = obstacle.left - rect.right if distance > 0 else rect.left - obstacle.right
+        else:
+            gap = obstacle.top - rect.bottom if distance > 0 else rect.top - obstacle.bottom
+
+        if -EPSILON <= gap < abs(distance):
+            distance = max(gap, 0) if distance > 0 else -max(gap, 0)
+            hit = obstacle
+    return distance, hit
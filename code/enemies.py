@@ -13,6 +13,9 @@
 from settings import *
 from random import choice
 from timer import Timer
+from support import flip_surface
+from collision import sweep
+from telemetry import telemetry
 
 class Tooth(pygame.sprite.Sprite):
     def __init__(self, pos, frames, groups, collision_sprites):
@@ -27,6 +30,15 @@ class Tooth(pygame.sprite.Sprite):
         self.speed = 200
 
 
+    def snapshot(self):
+        return {'pos': tuple(self.rect.topleft), 'direction': self.direction, 'frame_index': self.frame_index}
+
+
+    def restore(self, data):
+        self.rect.topleft = data['pos']
+        self.direction, self.frame_index = data['direction'], data['frame_index']
+
+
     def update(self, dt):
 
         # animate
@@ -35,17 +47,20 @@ class Tooth(pygame.sprite.Sprite):
 
         # change direction
         if self.direction < 0:
-            self.image = pygame.transform.flip(self.image, True, False)
+            self.image = flip_surface(self.image, True, False)
 
-        # move
-        self.rect.x += self.direction * self.speed * dt
+        # move, stopping at walls so a long frame can't carry it through one
+        distance, _ = sweep(self.rect, 'x', self.direction * self.speed * dt, self.collision_rects)
+        self.rect.x += distance
 
         # reverse direction
         floor_rect_right = pygame.FRect(self.rect.bottomright, (1,1))
         floor_rect_left = pygame.FRect(self.rect.bottomleft, (-1,1))
-        wall_rect = pygaem.FRect(
-            topleft =self.rect.topleft + vector(-1, 0), 
-            size = (self.rect.width + 2, 1))
+        # positional args: FRect ignores topleft= / size= keywords and comes
+        # out empty, which left teeth parked against walls once moves stopped there
+        wall_rect = pygame.FRect(
+            self.rect.topleft + vector(-1, 0),
+            (self.rect.width + 2, 1))
 
         if floor_rect_right.collidelist(self.collision_rects) > 0 and\
                 self.direction > 0 or\
@@ -60,6 +75,16 @@ class Shell(pygame.sprite.Sprite):
     def __init__(self, pos, frames, groups, reverse, player, create_pearl):
         super().__init__(groups)
 
+        if reverse:
+            # flip all frames in frames
+            self.frames = {}
+            for key, surfs in frames.items():
+                self.frames[key] = [flip_surface(surf, True, False) for surf in surfs]
+            self.bullet_dir = -1
+        else:
+            self.frames = frames
+            self.bullet_dir = 1
+
         self.frame_index = 0
         self.state = 'idle'
         self.image = self.frames[self.state][self.frame_index]
@@ -71,28 +96,18 @@ class Shell(pygame.sprite.Sprite):
         self.has_fired = False
         self.create_pearl = create_pearl
 
-        if reverse:
-            # flip all frames in frames
-            self.frames = {}
-            for key, surface in frames.items():
-                self.frames[key] = [pygame.transform.flip(surf, True, False) for s in surfs]
-            self.bullet_dir = -1
-        else:
-            self.frames = frames
-            self.bullet_dir = 1
-
 
     def state_management(self):
-        player_pos = vector(self.player.hitbox_rect.center)
-        shell_pos = vector(self.rect.center)
-        player_near = shell_pos.distance_to(player_pos) < 500
-        
+        player_x, player_y = self.player.hitbox.center
+        shell_x, shell_y = self.rect.center
+        player_near = (player_x - shell_x) ** 2 + (player_y - shell_y) ** 2 < 500 ** 2
+
         if self.bullet_dir > 0:
-            player_front = shell_pos.x < player_pos.x
+            player_front = shell_x < player_x
         else:
-            player_front = shell_pos.x > player_pos.x
-        
-        player_level = abs(shell_pos.y - player_pos.y) < 30
+            player_front = shell_x > player_x
+
+        player_level = abs(shell_y - player_y) < 30
 
         if player_near and\
                 player_front and\
@@ -103,6 +118,21 @@ class Shell(pygame.sprite.Sprite):
             self.shoot_timer.activate()
 
 
+    def snapshot(self):
+        return {
+            'state': self.state,
+            'frame_index': self.frame_index,
+            'has_fired': self.has_fired,
+            'shoot_timer': self.shoot_timer.snapshot()}
+
+
+    def restore(self, data):
+        self.state, self.frame_index = data['state'], data['frame_index']
+        self.has_fired = data['has_fired']
+        self.shoot_timer.restore(data['shoot_timer'])
+        self.image = self.frames[self.state][int(self.frame_index) % len(self.frames[self.state])]
+
+
     def update(self, dt):
         self.shoot_timer.update()
         self.state_management()
@@ -119,7 +149,7 @@ class Shell(pygame.sprite.Sprite):
                     not self.has_fired:
                 self.create_pearl(
                     pos = self.rect.center,
-                    dir = self.bullet_dir)
+                    direction = self.bullet_dir)
                 self.has_fired = True
         else:
             self.frame_index = 0
@@ -145,6 +175,18 @@ class Pearl(pygame.sprite.Sprite):
         self.timers['lifetime'].activate()
 
 
+    def snapshot(self):
+        return {
+            'center': tuple(self.rect.center),
+            'direction': self.direction,
+            'lifetime': self.timers['lifetime'].snapshot()}
+
+
+    def restore(self, data):
+        self.rect.center = data['center']
+        self.timers['lifetime'].restore(data['lifetime'])
+
+
     def update(self, dt):
         for timer in self.timers.values():
             timer.update()
@@ -152,5 +194,6 @@ class Pearl(pygame.sprite.Sprite):
         self.rect.x += self.direction * self.speed * dt
 
         if not self.timers['lifetime'].active:
+            telemetry.note('pearl expired')
             self.kill()
-                print('shoot pearl')
+
@@ -10,6 +10,16 @@
 # -----------------------------------------
 
 from settings import *
+from support import get_mask
+from sprites import Sprite
+from operator import attrgetter
+
+
+# grid cells (cell_size squares) a rect touches, for the spatial indexes below
+def get_cells(rect, cell_size):
+    left, top = int(rect.left // cell_size), int(rect.top // cell_size)
+    right, bottom = int(rect.right // cell_size), int(rect.bottom // cell_size)
+    return [(x, y) for x in range(left, right + 1) for y in range(top, bottom + 1)]
 
 
 class AllSprites(pygame.sprite.Group):
@@ -18,11 +28,213 @@ class AllSprites(pygame.sprite.Group):
         self.display_surface = pygame.display.get_surface()
         self.offset = vector(0, 0)
 
+        # sprites whose updates are scheduled by another group (see EnemyGroup)
+        self.scheduled = set()
+
+        # pre-rendered background / water layers, drawn between sprites by z
+        self.layers = []
+
+
+    def add_layers(self, layers):
+        self.layers = sorted(self.layers + layers, key = attrgetter('z'))
+
+
+    def update(self, *args):
+        scheduled = self.scheduled
+        for sprite in self.sprites():
+            if sprite not in scheduled:
+                sprite.update(*args)
+        for layer in self.layers:
+            layer.update(*args)
+
 
     def draw(self, target_pos):
         self.offset.x = -(target_pos[0] - WINDOW_WIDTH / 2)
         self.offset.y = -(target_pos[1] - WINDOW_HEIGHT / 2)
         
-        for sprite in sorted(self, key = lambda sprite: sprite.z):
-            offset_pos = sprite.rect.topleft + self.offset
-            self.display_surface.blit(sprite.image, offset_pos)
+        # snap the camera to whole pixels and hand every blit to pygame in
+        # one call instead of one blit (and one vector) per sprite
+        offset_x, offset_y = round(self.offset.x), round(self.offset.y)
+        blits = []
+
+        # the backdrop (sky or bg strip) is always the lowest layer. the sky
+        # paints the whole screen itself, a bg strip only needs the screen
+        # cleared when it leaves part of it uncovered
+        backdrop = self.layers[0] if self.layers else None
+        if hasattr(backdrop, 'fill'):
+            backdrop.fill(self.display_surface, offset_x, offset_y)
+        elif not (hasattr(backdrop, 'covers') and backdrop.covers(offset_x, offset_y)):
+            self.display_surface.fill('black')
+
+        layers = iter(self.layers)
+        layer = next(layers, None)
+        for sprite in sorted(self, key = attrgetter('z')):
+            while layer and layer.z < sprite.z:
+                blits.extend(layer.blits(offset_x, offset_y))
+                layer = next(layers, None)
+            blits.append((sprite.image, (sprite.rect.x + offset_x, sprite.rect.y + offset_y)))
+        while layer:
+            blits.extend(layer.blits(offset_x, offset_y))
+            layer = next(layers, None)
+        self.display_surface.fblits(blits)
+
+
+# moving platforms indexed on a coarse grid by the area their path covers,
+# so lookups only check platforms that could be near the given rect
+class PlatformGroup(pygame.sprite.Group):
+    def __init__(self, cell_size = TILE_SIZE * 4):
+        super().__init__()
+        self.cell_size = cell_size
+        self.cells = {}
+
+
+    def add_internal(self, sprite, layer = None):
+        super().add_internal(sprite, layer)
+        for cell in get_cells(sprite.path_rect, self.cell_size):
+            self.cells.setdefault(cell, set()).add(sprite)
+
+
+    def remove_internal(self, sprite):
+        super().remove_internal(sprite)
+        for cell in get_cells(sprite.path_rect, self.cell_size):
+            self.cells[cell].discard(sprite)
+
+
+    def near(self, rect):
+        candidates = set()
+        for cell in get_cells(rect, self.cell_size):
+            candidates.update(self.cells.get(cell, ()))
+        return [sprite for sprite in candidates if sprite.rect.colliderect(rect)]
+
+
+# damage sources, checked against a rect with a cheap bounding box pass
+# first and then a pixel test using the cached frame masks.
+# sources that stay inside a known area (spikes, saws along their path,
+# spike balls around their orbit) are put on a grid once, so a check only
+# looks at the cells around the rect. free movers (teeth, pearls) are few
+# and kept in a plain list
+class DamageGroup(pygame.sprite.Group):
+    def __init__(self, cell_size = TILE_SIZE * 4):
+        super().__init__()
+        self.rect_masks = {}
+        self.cell_size = cell_size
+        self.cells = {}
+        self.free = []
+        self.bounds = {}
+
+
+    # area a source can ever cover, None if it moves freely
+    def get_bounds(self, sprite):
+        if hasattr(sprite, 'path_rect'):
+            return sprite.path_rect
+        if isinstance(sprite, Sprite):
+            return sprite.rect
+        return None
+
+
+    def add_internal(self, sprite, layer = None):
+        super().add_internal(sprite, layer)
+        bounds = self.bounds[sprite] = self.get_bounds(sprite)
+        if bounds is None:
+            self.free.append(sprite)
+        else:
+            for cell in get_cells(bounds, self.cell_size):
+                self.cells.setdefault(cell, set()).add(sprite)
+
+
+    def remove_internal(self, sprite):
+        super().remove_internal(sprite)
+        bounds = self.bounds.pop(sprite)
+        if bounds is None:
+            self.free.remove(sprite)
+        else:
+            for cell in get_cells(bounds, self.cell_size):
+                self.cells[cell].discard(sprite)
+
+
+    def get_rect_mask(self, size):
+        if size not in self.rect_masks:
+            self.rect_masks[size] = pygame.Mask(size, fill = True)
+        return self.rect_masks[size]
+
+
+    def collide(self, rect):
+        nearby = set(self.free)
+        for cell in get_cells(rect, self.cell_size):
+            nearby.update(self.cells.get(cell, ()))
+        candidates = [sprite for sprite in nearby if sprite.rect.colliderect(rect)]
+        if not candidates:
+            return []
+
+        rect_mask = self.get_rect_mask((int(rect.width), int(rect.height)))
+        hits = []
+        for sprite in candidates:
+            offset = (int(rect.x - sprite.rect.x), int(rect.y - sprite.rect.y))
+            if get_mask(sprite.image).overlap(rect_mask, offset):
+                hits.append(sprite)
+        return hits
+
+
+# enemies are only simulated near the camera: inside wake_distance they
+# update every frame, inside lod_distance every lod_interval frames (with
+# the time they missed) and beyond that they sleep. all_sprites still draws
+# them but leaves their updates to this group
+class EnemyGroup(pygame.sprite.Group):
+    def __init__(self, all_sprites, wake_distance = WINDOW_WIDTH, lod_distance = WINDOW_WIDTH * 2, lod_interval = 4):
+        super().__init__()
+        self.all_sprites = all_sprites
+        self.wake_distance_sq = wake_distance ** 2
+        self.lod_distance_sq = lod_distance ** 2
+        self.lod_interval = lod_interval
+
+        self.frame = 0
+        self.phases = {}
+        self.missed_time = {}
+        self.added = 0
+
+
+    def add_internal(self, sprite, layer = None):
+        super().add_internal(sprite, layer)
+        self.all_sprites.scheduled.add(sprite)
+        # spread low rate updates evenly over the interval
+        self.phases[sprite] = self.added % self.lod_interval
+        self.missed_time[sprite] = 0
+        self.added += 1
+
+
+    def remove_internal(self, sprite):
+        super().remove_internal(sprite)
+        self.all_sprites.scheduled.discard(sprite)
+        del self.phases[sprite]
+        del self.missed_time[sprite]
+
+
+    def snapshot(self):
+        return {'frame': self.frame, 'missed_time': [self.missed_time[sprite] for sprite in self.sprites()]}
+
+
+    def restore(self, data):
+        self.frame = data['frame']
+        for sprite, missed_time in zip(self.sprites(), data['missed_time']):
+            self.missed_time[sprite] = missed_time
+
+
+    def update(self, dt, center):
+        self.frame += 1
+        center_x, center_y = center
+        for sprite in self.sprites():
+            dx = sprite.rect.centerx - center_x
+            dy = sprite.rect.centery - center_y
+            distance_sq = dx * dx + dy * dy
+
+            if distance_sq < self.wake_distance_sq:
+                sprite.update(dt + self.missed_time[sprite])
+                self.missed_time[sprite] = 0
+            elif distance_sq < self.lod_distance_sq:
+                self.missed_time[sprite] += dt
+                if self.frame % self.lod_interval == self.phases[sprite]:
+                    sprite.update(self.missed_time[sprite])
+                    self.missed_time[sprite] = 0
+            else:
+                # asleep, time doesn't pass
+                self.missed_time[sprite] = 0
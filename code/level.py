@@ -9,11 +9,15 @@
 
 # imports
 from settings import *
-from sprites import Sprite, AnimatedSprite, MovingSprite, Spike
+from sprites import Sprite, StaticSprite, AnimatedSprite, MovingSprite, Spike
 from player import Player
-from groups import AllSprites
+from groups import AllSprites, PlatformGroup, DamageGroup, EnemyGroup
+from parallax import create_layers
+from lighting import create_light_layers
 from random import uniform
 from enemies import Tooth, Shell, Pearl
+from support import flip_surface
+from telemetry import telemetry
 
 class Level:
     def __init__(self, tmx_map, level_frames):
@@ -23,17 +27,33 @@ class Level:
         self.all_sprites = AllSprites() 
         self.collision_sprites = pygame.sprite.Group()
         self.semicollision_sprites = pygame.sprite.Group()
-        self.damage_sprites = pygame.sprite.Group()
+        self.moving_platforms = PlatformGroup()
+        self.damage_sprites = DamageGroup()
         self.tooth_sprites = pygame.sprite.Group()
+        self.enemy_sprites = EnemyGroup(self.all_sprites)
         self.pearl_sprites = pygame.sprite.Group()
         
         self.setup(tmx_map, level_frames)
+        self.all_sprites.add_layers(create_layers(tmx_map, level_frames))
+        self.all_sprites.add_layers(create_light_layers(tmx_map, level_frames['candle_light'], self.light_positions))
 
         # frames
         self.pearl_surface = level_frames['pearl']
 
+        # snapshots
+        # everything that can change while playing, in creation order
+        # (pearls come and go, so they're stored separately)
+        self.stateful_sprites = [sprite for sprite in self.all_sprites
+            if hasattr(sprite, 'snapshot') and not hasattr(sprite, 'pearl')]
+        self.start_snapshot = self.snapshot()
+
+        # damage sources that touched the player on the last frame
+        self.player_hits = []
+
         
     def setup(self, tmx_map, level_frames):
+        self.light_positions = []
+
         # Terrain tiles
         # need .tiles() since they're tiles, not objects
         for layer in ['BG', 'Terrain', 'FG', 'Platforms']:
@@ -48,16 +68,16 @@ class Level:
                     case 'FG': z = Z_LAYERS['fg']
                     case _: z = Z_LAYERS['main']
 
-                Sprite((x*TILE_SIZE,y*TILE_SIZE), surface, groups, z)
+                StaticSprite((x*TILE_SIZE,y*TILE_SIZE), surface, groups, z)
 
         # bg details
         for obj in tmx_map.get_layer_by_name('BG details'):
             if obj.name == 'static':
-                Sprite((obj.x, obj.y), obj.image, self.all_sprites, z = Z_LAYERS['bg tiles'])
+                StaticSprite((obj.x, obj.y), obj.image, self.all_sprites, z = Z_LAYERS['bg tiles'])
             else:
                 AnimatedSprite((obj.x, obj.y), level_frames[obj.name], self.all_sprites, Z_LAYERS['bg tiles'])
                 if obj.name == 'candle':
-                    AnimatedSprite((obj.x, obj.y) + vector(-20, 20), level_frames['candle_light'], self.all_sprites, Z_LAYERS['bg tiles'])
+                    self.light_positions.append((obj.x - 20, obj.y + 20))
 
 
         # objects
@@ -70,6 +90,7 @@ class Level:
                     groups = self.all_sprites,
                     collision_sprites = self.collision_sprites,
                     semicollision_sprites = self.semicollision_sprites,
+                    moving_platforms = self.moving_platforms,
                     frames = level_frames['player'])
             else:
                 if obj.name in ('barrel', 'crate'):
@@ -86,7 +107,7 @@ class Level:
 
                     if obj.name == 'floor_spike' and obj.properties['inverted']:
                         # flip vertically (sprite, horizontal, vertical)
-                        frames = [pygame.transform.flip(frame, False, True) for frame in frames]
+                        frames = [flip_surface(frame, False, True) for frame in frames]
                     
                     # groups
                     groups = [self.all_sprites]
@@ -135,7 +156,7 @@ class Level:
             else:
                 frames = level_frames[obj.name]
                 if obj.properties['platform']:
-                    groups = (self.all_sprites, self.semicollision_sprites)
+                    groups = (self.all_sprites, self.semicollision_sprites, self.moving_platforms)
                 else:
                     groups = (self.all_sprites, self.damage_sprites)
 
@@ -166,7 +187,7 @@ class Level:
                         y = start_pos[1] - level_frames['saw_chain'].get_height() / 2
                         left, right = int(start_pos[0]), int(end_pos[0])
                         for x in range(left, right, 20):     # 20 = pixels
-                            Sprite(
+                            StaticSprite(
                                 (x, y),
                                 level_frames['saw_chain'],
                                 self.all_sprites,
@@ -175,7 +196,7 @@ class Level:
                         x = start_pos[0] - level_frames['saw_chain'].get_width() / 2
                         top, bottom = int(start_pos[1]), int(end_pos[1])
                         for y in range(top, bottom, 20):
-                            Sprite(
+                            StaticSprite(
                                 (x, y),
                                 level_frames['saw_chain'],
                                 self.all_sprites,
@@ -187,22 +208,24 @@ class Level:
                 Tooth(
                     pos = (obj.x, obj.y),
                     frames = level_frames['tooth'],
-                    groups = (self.all_sprites, self.damage_sprites, self.tooth_sprites),
+                    groups = (self.all_sprites, self.damage_sprites, self.tooth_sprites, self.enemy_sprites),
                     collision_sprites = self.collision_sprites)
             if obj.name == 'shell':
                 Shell(
                     pos = (obj.x, obj.y),
                     frames = level_frames['shell'],
-                    groups = (self.all_sprites, self.collision_sprites),
+                    groups = (self.all_sprites, self.collision_sprites, self.enemy_sprites),
                     reverse = obj.properties['reverse'],
-                    player = self.player,)
+                    player = self.player,
+                    create_pearl = self.create_pearl)
 
     
     def create_pearl(self, pos, direction):
-        Pearl(
+        telemetry.note('pearl created')
+        return Pearl(
             pos = pos,
             groups = (self.all_sprites, self.damage_sprites, self.pearl_sprites),
-            frames = self.pearl_surface,
+            surface = self.pearl_surface,
             dir = direction,
             speed = 150)
 
@@ -214,17 +237,41 @@ class Level:
             pygame.sprite.spritecollide(sprite, self.pearl_sprites, True)
 
     def hit_collision(self):
-        for sprite in self.damage_sprites:
-            if sprite.rect.colliderect(self.player.hitbox):
-                if hasattr(sprite, 'pearl'):
-                    sprite.kill()                
+        hits = self.damage_sprites.collide(self.player.hitbox)
+        for sprite in hits:
+            if hasattr(sprite, 'pearl'):
+                sprite.kill()
+        return hits
 
 
-    def run(self, dt):
-        self.display_surface.fill('black')
+    # plain data (dicts, lists, tuples, numbers) so it can be stored as json
+    def snapshot(self):
+        return {
+            'sprites': [sprite.snapshot() for sprite in self.stateful_sprites],
+            'pearls': [pearl.snapshot() for pearl in self.pearl_sprites],
+            'enemies': self.enemy_sprites.snapshot()}
+
+
+    def restore(self, snapshot):
+        for sprite, data in zip(self.stateful_sprites, snapshot['sprites']):
+            sprite.restore(data)
 
+        for pearl in self.pearl_sprites.sprites():
+            pearl.kill()
+        for data in snapshot['pearls']:
+            self.create_pearl(data['center'], data['direction']).restore(data)
+
+        self.enemy_sprites.restore(snapshot['enemies'])
+
+
+    def restart(self):
+        self.restore(self.start_snapshot)
+
+
+    def run(self, dt):
         self.all_sprites.update(dt)
+        self.enemy_sprites.update(dt, self.player.hitbox.center)
         self.pearl_collision()
-        self.hit_collision()
+        self.player_hits = self.hit_collision()
 
         self.all_sprites.draw(self.player.hitbox.center)
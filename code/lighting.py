@@ -0,0 +1,158 @@
+# -----------------------------------------
+#
+# lighting.py
+#
+# candle lights and dark areas
+# all lights of one kind animate together, so for every chunk of the level
+# and every animation frame the lights are composed once into a cached
+# light map. drawing is then one blit per visible chunk, however many
+# lights there are. only chunks around the view stay cached, and each map
+# only covers the part of its chunk that has something in it
+#
+# Dustin Heyden
+# Oct 19, 2026
+#
+# -----------------------------------------
+
+from settings import *
+from support import surface_registry
+
+CHUNK_SIZE = 512
+CACHE_MARGIN = CHUNK_SIZE // 2     # around the view, so maps survive small camera moves
+
+
+def get_chunks(rect):
+    left, top = int(rect.left // CHUNK_SIZE), int(rect.top // CHUNK_SIZE)
+    right, bottom = int(rect.right // CHUNK_SIZE), int(rect.bottom // CHUNK_SIZE)
+    return [(x, y) for x in range(left, right + 1) for y in range(top, bottom + 1)]
+
+
+def get_chunk_rect(chunk):
+    return pygame.Rect(chunk[0] * CHUNK_SIZE, chunk[1] * CHUNK_SIZE, CHUNK_SIZE, CHUNK_SIZE)
+
+
+class LightLayer:
+    def __init__(self, frames, positions, z, animation_speed = ANIMATION_SPEED):
+        self.frames, self.frame_index = frames, 0
+        self.positions = positions
+        self.z = z
+        self.animation_speed = animation_speed
+
+        # chunk -> lights touching it
+        self.chunks = {}
+        for pos in positions:
+            for chunk in get_chunks(self.frames[0].get_frect(topleft = pos)):
+                self.chunks.setdefault(chunk, []).append(pos)
+
+        # chunk -> world rect its light maps cover
+        self.areas = {}
+
+        # (chunk, frame) -> light map, baked the first time it's on screen
+        # and dropped once the chunk is away from the view
+        self.cache = {}
+        self.cached_chunks = set()
+
+
+    def update(self, dt):
+        self.frame_index += self.animation_speed * dt
+
+
+    # what a chunk's light map has to cover, before clipping to the chunk
+    def get_bounds(self, chunk):
+        size = self.frames[0].get_size()
+        rects = [pygame.Rect(pos, size) for pos in self.chunks[chunk]]
+        return rects[0].unionall(rects[1:])
+
+
+    def get_area(self, chunk):
+        if chunk not in self.areas:
+            self.areas[chunk] = self.get_bounds(chunk).clip(get_chunk_rect(chunk))
+        return self.areas[chunk]
+
+
+    # cache key for a chunk in an animation frame
+    def get_key(self, chunk, frame):
+        return (chunk, frame)
+
+
+    def bake(self, chunk, frame):
+        area = self.get_area(chunk)
+        light_map = pygame.Surface(area.size, pygame.SRCALPHA)
+        for x, y in self.chunks[chunk]:
+            light_map.blit(self.frames[frame], (int(x) - area.x, int(y) - area.y))
+        return light_map
+
+
+    def evict(self, chunks):
+        for key in [key for key in self.cache if key[0] not in chunks]:
+            surface_registry.discard(self.cache.pop(key))
+        self.cached_chunks = {chunk for chunk, frame in self.cache}
+
+
+    def blits(self, offset_x, offset_y):
+        frame = int(self.frame_index % len(self.frames))
+        view = pygame.FRect(-offset_x, -offset_y, WINDOW_WIDTH, WINDOW_HEIGHT)
+
+        nearby = set(get_chunks(view.inflate(CACHE_MARGIN * 2, CACHE_MARGIN * 2)))
+        if not nearby >= self.cached_chunks:
+            self.evict(nearby)
+
+        blits = []
+        for chunk in get_chunks(view):
+            if chunk in self.chunks:
+                key = self.get_key(chunk, frame)
+                if key not in self.cache:
+                    # light maps belong to the running stage, like the rest of its surfaces
+                    self.cache[key] = self.bake(chunk, frame)
+                    surface_registry.adopt(self.cache[key])
+                    self.cached_chunks.add(chunk)
+                area = self.get_area(chunk)
+                blits.append((self.cache[key], (area.x + offset_x, area.y + offset_y)))
+        return blits
+
+
+# darkness over the given areas with the lights cut out of it
+class DarknessLayer(LightLayer):
+    def __init__(self, frames, positions, dark_areas, z, animation_speed = ANIMATION_SPEED):
+        super().__init__(frames, positions, z, animation_speed)
+        self.lights = self.chunks
+
+        # chunk -> (rect, darkness) of the areas touching it
+        self.chunks = {}
+        for rect, darkness in dark_areas:
+            for chunk in get_chunks(rect):
+                self.chunks.setdefault(chunk, []).append((rect, darkness))
+
+
+    def get_bounds(self, chunk):
+        rects = [rect for rect, darkness in self.chunks[chunk]]
+        return rects[0].unionall(rects[1:])
+
+
+    # without lights in it a chunk looks the same in every frame
+    def get_key(self, chunk, frame):
+        return (chunk, frame if chunk in self.lights else None)
+
+
+    def bake(self, chunk, frame):
+        area = self.get_area(chunk)
+        light_map = pygame.Surface(area.size, pygame.SRCALPHA)
+        for rect, darkness in self.chunks[chunk]:
+            light_map.fill((0, 0, 0, darkness), rect.move(-area.x, -area.y))
+        # whole pixels first, a light starting left of / above the map would
+        # otherwise be truncated towards zero and land a pixel off
+        for x, y in self.lights.get(chunk, ()):
+            light_map.blit(self.frames[frame], (int(x) - area.x, int(y) - area.y), special_flags = pygame.BLEND_RGBA_SUB)
+        return light_map
+
+
+def create_light_layers(tmx_map, frames, positions):
+    layers = [LightLayer(frames, positions, Z_LAYERS['bg tiles'])]
+
+    # optional 'Dark' object layer, each object a darkened area
+    if 'Dark' in tmx_map.layernames:
+        dark_areas = [
+            (pygame.Rect(obj.x, obj.y, obj.width, obj.height), obj.properties.get('darkness', 200))
+            for obj in tmx_map.get_layer_by_name('Dark')]
+        layers.append(DarknessLayer(frames, positions, dark_areas, Z_LAYERS['fg']))
+    return layers
@@ -14,63 +14,145 @@ from settings import *
 from level import Level
 from pytmx.util_pygame import load_pygame
 from os.path import join
+from collections import deque
+from time import perf_counter
+from telemetry import telemetry
 
 from support import *
 
 
 class Game:
     def __init__(self):
+        self.start_time = perf_counter()
         pygame.init()
         self.display_surface = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
         pygame.display.set_caption('Super Pirate World')
+        self.font = pygame.font.Font(None, 40)
 
         # for framerate independence
         self.clock = pygame.time.Clock()
         self.import_assets()
 
         # levels
-        self.tmx_maps = {0: load_pygame(join('..', 'data', 'levels', 'omni.tmx'))}
-        self.current_stage = Level(self.tmx_maps[0], self.level_frames)
+        self.level_paths = {0: join('..', 'data', 'levels', 'omni.tmx')}
+        self.tmx_maps = {}
+        self.stage = None
+        self.current_stage = None
+
+        # startup runs one step per frame behind the loading screen, most
+        # important first. the other frames load while the level is running
+        self.load_steps = deque([
+            ('player', lambda: self.level_frames['player']),
+            ('level', lambda: self.load_map(0)),
+            ('stage', lambda: self.load_stage(0)),
+        ])
+        self.load_step_count = len(self.load_steps)
+        self.metrics = {}
+
+    def load_map(self, stage):
+        if stage not in self.tmx_maps:
+            tmx_map = load_pygame(self.level_paths[stage])
+            optimize_tmx(tmx_map)
+            self.tmx_maps[stage] = tmx_map
+        # tile and object art belongs to the stage, so it's counted in the
+        # report and dropped with the stage like everything else it loaded
+        for image in self.tmx_maps[stage].images:
+            if image:
+                surface_registry.adopt(image, stage)
+        return self.tmx_maps[stage]
+
+    def load_stage(self, stage):
+        # surfaces created while building / running a level belong to its stage,
+        # anything only the outgoing stage used is dropped afterwards
+        previous_stage, self.stage = self.stage, stage
+        surface_registry.begin(stage)
+        telemetry.note(f'level load ({stage})')
+        self.current_stage = Level(self.load_map(stage), self.level_frames)
+        if previous_stage is not None and previous_stage != stage:
+            surface_registry.release(previous_stage)
+            # its tile art is gone from the registry, reload the map if needed again
+            self.tmx_maps.pop(previous_stage, None)
+        print(f'stage {stage} textures - {surface_registry.report()}')
 
     def import_assets(self):
-        self.level_frames = {
-            'flag': import_folder('..', 'graphics', 'level', 'flag'),
-            'saw': import_folder('..', 'graphics', 'enemies', 'saw', 'animation'),
-            'floor_spike': import_folder('..', 'graphics', 'enemies', 'floor_spikes'),
-            'palms': import_sub_folders('..', 'graphics', 'level', 'palms'),
-            'candle': import_folder('..', 'graphics', 'level', 'candle'),
-            'window': import_folder('..', 'graphics', 'level', 'window'),
-            'big_chain': import_folder('..', 'graphics', 'level', 'big_chains'),
-            'small_chain': import_folder('..', 'graphics', 'level', 'small_chains'),
-            'candle_light': import_folder('..', 'graphics', 'level', 'candle light'),
-            'player': import_sub_folders('..', 'graphics', 'player'),
-            'saw': import_folder('..', 'graphics', 'enemies', 'saw', 'animation'),
-            'saw_chain': import_image('..', 'graphics', 'enemies', 'saw', 'saw_chain'),
-            'helicopter': import_folder('..', 'graphics', 'level', 'helicopter'),
-            'boat': import_folder('..', 'graphics', 'objects', 'boat'),
-            'spike': import_image('..', 'graphics', 'enemies', 'spike_ball', 'Spiked Ball'),
-            'spike_chain': import_image('..', 'graphics', 'enemies', 'spike_ball', 'spiked_chain'),
-            'tooth': import_folder('..', 'graphics', 'enemies', 'tooth', 'run'),
-            'shell': import_sub_folders('..', 'graphics', 'enemies', 'shell'),
-            'pearl': import_image('..', 'graphics', 'enemies', 'bullets', 'pearl'),
-        }
+        # nothing is imported here, each entry loads on first use
+        self.level_frames = LazyFrames({
+            'flag': lambda: import_folder('..', 'graphics', 'level', 'flag'),
+            'saw': lambda: cache_masks(import_folder('..', 'graphics', 'enemies', 'saw', 'animation'), flip_x = True, flip_y = True),
+            'floor_spike': lambda: cache_masks(import_folder('..', 'graphics', 'enemies', 'floor_spikes'), flip_y = True),
+            'palms': lambda: import_sub_folders('..', 'graphics', 'level', 'palms'),
+            'candle': lambda: import_folder('..', 'graphics', 'level', 'candle'),
+            'window': lambda: import_folder('..', 'graphics', 'level', 'window'),
+            'big_chain': lambda: import_folder('..', 'graphics', 'level', 'big_chains'),
+            'small_chain': lambda: import_folder('..', 'graphics', 'level', 'small_chains'),
+            'candle_light': lambda: import_folder('..', 'graphics', 'level', 'candle light'),
+            'player': lambda: import_sub_folders('..', 'graphics', 'player'),
+            'saw_chain': lambda: import_image('..', 'graphics', 'enemies', 'saw', 'saw_chain'),
+            'helicopter': lambda: import_folder('..', 'graphics', 'level', 'helicopter'),
+            'boat': lambda: import_folder('..', 'graphics', 'objects', 'boat'),
+            'spike': lambda: cache_masks(import_image('..', 'graphics', 'enemies', 'spike_ball', 'Spiked Ball')),
+            'spike_chain': lambda: import_image('..', 'graphics', 'enemies', 'spike_ball', 'spiked_chain'),
+            'tooth': lambda: cache_masks(import_folder('..', 'graphics', 'enemies', 'tooth', 'run'), flip_x = True),
+            'shell': lambda: import_sub_folders('..', 'graphics', 'enemies', 'shell'),
+            'pearl': lambda: cache_masks(import_image('..', 'graphics', 'enemies', 'bullets', 'pearl')),
+            'bg_tiles': lambda: import_folder_dict('..', 'graphics', 'level', 'bg', 'tiles'),
+            'cloud_large': lambda: import_image('..', 'graphics', 'level', 'clouds', 'large_cloud'),
+            'cloud_small': lambda: import_folder('..', 'graphics', 'level', 'clouds', 'small'),
+            'water_top': lambda: import_folder('..', 'graphics', 'level', 'water', 'top'),
+            'water_body': lambda: import_image('..', 'graphics', 'level', 'water', 'body'),
+        })
         #print(self.level_frames)
         #print("loaded level_frames")
 
+    def draw_loading_screen(self):
+        label = self.load_steps[0][0]
+        progress = 1 - len(self.load_steps) / self.load_step_count
+
+        self.display_surface.fill('black')
+        text = self.font.render(f'loading {label}', True, 'white')
+        self.display_surface.blit(text, text.get_frect(midbottom = (WINDOW_WIDTH / 2, WINDOW_HEIGHT / 2 - 20)))
+        bar = pygame.FRect(0, 0, WINDOW_WIDTH / 2, 20)
+        bar.center = (WINDOW_WIDTH / 2, WINDOW_HEIGHT / 2 + 10)
+        pygame.draw.rect(self.display_surface, 'white', bar, 2)
+        pygame.draw.rect(self.display_surface, 'white', (bar.x, bar.y, bar.width * progress, bar.height))
+
+    def record_metric(self, name):
+        if name not in self.metrics:
+            self.metrics[name] = perf_counter() - self.start_time
+            print(f'{name}: {self.metrics[name] * 1000:.0f} ms')
+
     def run(self):
         while True:
             # pass '30' to tick to use 30 fps
             dt = self.clock.tick() / 1000
+            telemetry.end_frame(dt, len(self.current_stage.all_sprites) if self.current_stage else 0)
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
+                    telemetry.write_summary()
                     pygame.quit()
                     sys.exit()
 
+            if self.load_steps:
+                self.draw_loading_screen()
+                pygame.display.update()
+                self.record_metric('time to first frame')
+
+                self.load_steps.popleft()[1]()
+                if not self.load_steps:
+                    print(f'surface formats - {format_report()}')
+                    # don't hand the loading time to the first gameplay frame
+                    self.clock.tick()
+                continue
+
             self.current_stage.run(dt)
+            self.level_frames.load_next()
 
             pygame.display.update()
+            self.record_metric('time to interactive')
 
 
 if __name__ == '__main__':
+    if '--telemetry' in sys.argv:
+        telemetry.enable()
     game = Game()
     game.run()
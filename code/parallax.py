@@ -0,0 +1,150 @@
+# -----------------------------------------
+#
+# parallax.py
+#
+# background, cloud and water layers
+# each layer is pre-rendered once into a strip that repeats horizontally,
+# so drawing it is a single blit no matter how wide the level is
+#
+# Dustin Heyden
+# Oct 19, 2026
+#
+# -----------------------------------------
+
+from settings import *
+from random import Random
+from math import ceil
+from support import optimize_surface, surface_registry
+
+SKY_COLOR = '#ddc6a1'
+SEA_COLOR = '#92a9ce'
+
+
+# repeat a pattern sideways until it covers the screen plus one pattern,
+# so any scroll position can be drawn with one blit. strips belong to the
+# stage being built, so the registry counts them and drops them with it
+def make_strip(pattern, height = None):
+    width = pattern.get_width()
+    height = height or pattern.get_height()
+    strip = pygame.Surface((width * (ceil(WINDOW_WIDTH / width) + 1), height), pygame.SRCALPHA)
+    for x in range(0, strip.get_width(), width):
+        for y in range(0, height, pattern.get_height()):
+            strip.blit(pattern, (x, y))
+    strip = optimize_surface(strip)
+    surface_registry.adopt(strip)
+    return strip
+
+
+class ParallaxLayer:
+    def __init__(self, frames, period, pos, z, factor = 1, animation_speed = ANIMATION_SPEED, opaque = False):
+        self.frames, self.frame_index = frames, 0
+        self.image = self.frames[0]
+        self.period = period
+        self.pos = pos
+        self.z = z
+        self.factor = factor
+        self.animation_speed = animation_speed
+        self.opaque = opaque
+
+
+    def update(self, dt):
+        if len(self.frames) > 1:
+            self.frame_index += self.animation_speed * dt
+            self.image = self.frames[int(self.frame_index % len(self.frames))]
+
+
+    # only scrolls sideways at its own rate, vertically it stays in the world
+    def blits(self, offset_x, offset_y):
+        x = (self.pos[0] + offset_x * self.factor) % self.period - self.period
+        return [(self.image, (x, self.pos[1] + offset_y))]
+
+
+    # the strip is always wide enough, so an opaque one hides the whole view
+    # unless the camera looks past its top or bottom
+    def covers(self, offset_x, offset_y):
+        top = self.pos[1] + offset_y
+        return self.opaque and top <= 0 and top + self.image.get_height() >= WINDOW_HEIGHT
+
+
+# two flat colours split at the horizon. drawn with two fills as the backdrop
+# instead of holding a surface twice the screen's height
+class SkyLayer:
+    def __init__(self, horizon_line, z):
+        self.horizon_line = horizon_line
+        self.z = z
+
+
+    def update(self, dt):
+        pass
+
+
+    # the horizon is clamped to the screen, so sky and sea always fill it
+    def fill(self, surface, offset_x, offset_y):
+        horizon = min(max(self.horizon_line + offset_y, 0), WINDOW_HEIGHT)
+        surface.fill(SKY_COLOR, (0, 0, WINDOW_WIDTH, horizon))
+        surface.fill(SEA_COLOR, (0, horizon, WINDOW_WIDTH, WINDOW_HEIGHT - horizon))
+
+
+    def blits(self, offset_x, offset_y):
+        return []
+
+
+def small_cloud_pattern(clouds, height, count = 12, seed = 0):
+    random = Random(seed)
+    pattern = pygame.Surface((WINDOW_WIDTH, height), pygame.SRCALPHA)
+    for _ in range(count):
+        cloud = random.choice(clouds)
+        x = random.randint(0, WINDOW_WIDTH)
+        y = random.randint(0, max(0, height - cloud.get_height()))
+        # draw across the seam as well so the pattern wraps cleanly
+        pattern.blit(cloud, (x, y))
+        pattern.blit(cloud, (x - WINDOW_WIDTH, y))
+    return pattern
+
+
+def create_layers(tmx_map, level_frames):
+    data = tmx_map.get_layer_by_name('Data')[0].properties
+    horizon_line = data['horizon_line']
+    layers = []
+
+    if data['bg']:
+        bg_tile = level_frames['bg_tiles'][data['bg']]
+        strip = make_strip(bg_tile, tmx_map.height * TILE_SIZE)
+        # only a tile without see-through pixels can stand in for clearing the screen
+        opaque = pygame.mask.from_surface(bg_tile, 254).count() == bg_tile.get_width() * bg_tile.get_height()
+        layers.append(ParallaxLayer([strip], bg_tile.get_width(), (0, 0), Z_LAYERS['bg'], opaque = opaque))
+    else:
+        layers.append(SkyLayer(horizon_line, Z_LAYERS['bg']))
+
+        large_cloud = level_frames['cloud_large']
+        layers.append(ParallaxLayer(
+            [make_strip(large_cloud)],
+            large_cloud.get_width(),
+            (0, horizon_line - large_cloud.get_height()),
+            Z_LAYERS['clouds'],
+            0.5))
+
+        small_clouds = small_cloud_pattern(level_frames['cloud_small'], horizon_line // 2)
+        layers.append(ParallaxLayer(
+            [make_strip(small_clouds)],
+            small_clouds.get_width(),
+            (0, 0),
+            Z_LAYERS['clouds'],
+            0.25))
+
+    for obj in tmx_map.get_layer_by_name('Water'):
+        top = level_frames['water_top']
+        top_height = top[0].get_height()
+        body = level_frames['water_body']
+        layers.append(ParallaxLayer(
+            [make_strip(frame) for frame in top],
+            top[0].get_width(),
+            (obj.x, obj.y),
+            Z_LAYERS['water']))
+        layers.append(ParallaxLayer(
+            [make_strip(body, int(obj.height) - top_height)],
+            body.get_width(),
+            (obj.x, obj.y + top_height),
+            Z_LAYERS['water']))
+
+    return layers
@@ -12,12 +12,14 @@
 # imports
 from settings import *
 from timer import Timer
+from support import flip_surface
+from collision import sweep
 from os.path import join
 
 
 # player class
 class Player(pygame.sprite.Sprite):
-    def __init__(self, pos, groups, collision_sprites, semicollision_sprites, frames):
+    def __init__(self, pos, groups, collision_sprites, semicollision_sprites, moving_platforms, frames):
         # general setup
         super().__init__(groups)
         self.z = Z_LAYERS['main']
@@ -43,10 +45,22 @@ class Player(pygame.sprite.Sprite):
         # collision
         self.collision_sprites = collision_sprites
         self.semicollision_sprites = semicollision_sprites
+        self.moving_platforms = moving_platforms
         self.on_surface = {'floor': False, 'left': False, 'right': False}
+
+        # rect lists for sweeps and contact checks. the level keeps adding to
+        # the collision groups after the player exists, so they're collected on
+        # the first update. tile rects never change and moving sprites move
+        # their rect in place, so the lists stay valid from then on
+        self.collision_rects = None
+        self.semicollision_rects = None
+        self.landing_rects = None
         
         self.platform = None
 
+        # swapped out by playtest agents when running headless
+        self.get_keys = pygame.key.get_pressed
+
         # Timer
         self.timers = {
                 'wall jump': Timer(400),
@@ -65,7 +79,7 @@ class Player(pygame.sprite.Sprite):
 
     # handle player input
     def input(self):
-        keys = pygame.key.get_pressed()
+        keys = self.get_keys()
         input_vector = vector(0,0)
 
         if not self.timers['wall jump'].active:
@@ -92,10 +106,25 @@ class Player(pygame.sprite.Sprite):
             self.timers['wall jump'].activate()
 
 
+    # move along one axis, stopping at the first solid surface in the way
+    # (or platform, when falling) instead of passing through it
+    def sweep_move(self, axis, distance):
+        obstacles = self.collision_rects
+        if axis == 'y' and distance > 0 and not self.timers['platform skip'].active:
+            obstacles = self.landing_rects
+
+        distance, hit = sweep(self.hitbox, axis, distance, obstacles)
+        if axis == 'x':
+            self.hitbox.x += distance
+        else:
+            self.hitbox.y += distance
+        return hit
+
+
     # movement logic
     def move(self, dt):
         # horizontal
-        self.hitbox.x += self.direction.x * self.speed * dt
+        self.sweep_move('x', self.direction.x * self.speed * dt)
         self.collision('horizontal')
 
         # vertical
@@ -103,11 +132,13 @@ class Player(pygame.sprite.Sprite):
             and any((self.on_surface['left'], self.on_surface['right'])) \
             and not self.timers['wall slide block'].active:
             self.direction.y = 0
-            self.hitbox.y += self.gravity / 10 * dt
+            self.sweep_move('y', self.gravity / 10 * dt)
         else:
             self.direction.y += self.gravity / 2 * dt
-            self.hitbox.y += self.direction.y * dt
+            hit = self.sweep_move('y', self.direction.y * dt)
             self.direction.y += self.gravity / 2 * dt
+            if hit:
+                self.direction.y = 0
 
         # jump
         if self.jump:
@@ -129,9 +160,10 @@ class Player(pygame.sprite.Sprite):
         self.rect.center = self.hitbox.center
 
 
-    def platform_move(self, dt):
-        if self.platform:
-            self.hitbox.topleft += self.platform.direction * self.platform.speed * dt
+    # called by the platform we're standing on after it moves
+    def ride(self, offset):
+        self.hitbox.topleft += offset
+        self.rect.center = self.hitbox.center
 
 
     def check_contact(self):
@@ -141,8 +173,8 @@ class Player(pygame.sprite.Sprite):
         left_rect  = pygame.Rect(self.hitbox.topleft +
             vector(-2, self.hitbox.height/4), (2, self.hitbox.height / 2))
 
-        collide_rects = [sprite.rect for sprite in self.collision_sprites]
-        semicollide_rects = [sprite.rect for sprite in self.semicollision_sprites]
+        collide_rects = self.collision_rects
+        semicollide_rects = self.semicollision_rects
 
         # collisions
         self.on_surface['floor'] = True if floor_rect.collidelist(collide_rects) >= 0 \
@@ -152,11 +184,14 @@ class Player(pygame.sprite.Sprite):
         self.on_surface['left'] = True if left_rect.collidelist(collide_rects) >= 0 else False
 
         # standing on platform
-        self.platform = None
-        sprites = self.collision_sprites.sprites() + self.semicollision_sprites.sprites()
-        for sprite in [sprite for sprite in sprites if hasattr(sprite, 'moving')]:
-            if sprite.rect.colliderect(floor_rect):
-                self.platform = sprite
+        platforms = self.moving_platforms.near(floor_rect)
+        platform = platforms[0] if platforms else None
+        if platform is not self.platform:
+            if self.platform:
+                self.platform.detach(self)
+            if platform:
+                platform.attach(self)
+            self.platform = platform
 
 
     # handle collisions
@@ -208,7 +243,7 @@ class Player(pygame.sprite.Sprite):
             self.state = 'idle'
 
         self.image = self.frames[self.state][int(self.frame_index % len(self.frames[self.state]))]
-        self.image = self.image if self.facing_right else pygame.transform.flip(self.image, True, False)
+        self.image = self.image if self.facing_right else flip_surface(self.image, True, False)
 
         if self.attacking and self.frame_index > len(self.frames[self.state]):
             self.attacking = False
@@ -230,17 +265,55 @@ class Player(pygame.sprite.Sprite):
                     self.state = 'jump' if self.direction.y < 0 else 'fall'
 
 
+    def snapshot(self):
+        return {
+            'pos': tuple(self.hitbox.topleft),
+            'old_pos': tuple(self.old_rect.topleft),
+            'direction': tuple(self.direction),
+            'state': self.state,
+            'frame_index': self.frame_index,
+            'facing_right': self.facing_right,
+            'attacking': self.attacking,
+            'on_surface': dict(self.on_surface),
+            'timers': {name: timer.snapshot() for name, timer in self.timers.items()}}
+
+
+    def restore(self, data):
+        self.hitbox.topleft = data['pos']
+        self.old_rect.topleft = data['old_pos']
+        self.rect.center = self.hitbox.center
+        self.direction.update(data['direction'])
+        self.state, self.frame_index = data['state'], data['frame_index']
+        self.facing_right = data['facing_right']
+        self.attacking = data['attacking']
+        self.jump = False
+        self.on_surface = dict(data['on_surface'])
+        for name, timer in data['timers'].items():
+            self.timers[name].restore(timer)
+        if self.platform:
+            self.platform.detach(self)
+            self.platform = None
+        self.animate(0)
+
+
     def update_timers(self):
         for timer in self.timers.values():
             timer.update()
 
 
+    def collect_rects(self):
+        self.collision_rects = [sprite.rect for sprite in self.collision_sprites]
+        self.semicollision_rects = [sprite.rect for sprite in self.semicollision_sprites]
+        self.landing_rects = self.collision_rects + self.semicollision_rects
+
+
     def update(self, dt):
+        if self.collision_rects is None:
+            self.collect_rects()
         self.old_rect = self.hitbox.copy()
         self.update_timers()
         self.input()
         self.move(dt)
-        self.platform_move(dt)
         self.check_contact()
 
         self.get_state()
@@ -0,0 +1,255 @@
+# -----------------------------------------
+#
+# playtest.py
+#
+# headless batch playtesting of tmx levels
+# runs each level through Level.run with input agents on a process pool
+# and reports completion, deaths, stuck runs and frame times
+#
+# run with: python playtest.py [levels...] --runs 100
+#
+# Dustin Heyden
+# Oct 19, 2026
+#
+# -----------------------------------------
+
+import os
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+from settings import *
+from main import Game
+from level import Level
+from support import optimize_tmx, surface_registry
+from timer import set_time_source
+from pytmx.util_pygame import load_pygame
+from multiprocessing import Pool
+from random import Random, seed as seed_random
+from glob import glob
+from os.path import join, basename
+from time import perf_counter
+import argparse, json
+
+FPS = 60
+STUCK_TIME = 5          # seconds without moving STUCK_DISTANCE
+STUCK_DISTANCE = TILE_SIZE
+BUCKET_MS = 0.1         # frame time histogram resolution
+
+
+# stand-in for pygame.key.get_pressed, indexed by key constant
+class Keys:
+    def __init__(self, pressed = ()):
+        self.pressed = set(pressed)
+
+    def __getitem__(self, key):
+        return key in self.pressed
+
+
+# holds right and jumps at a fixed rhythm
+class RunRightAgent:
+    def __init__(self, seed):
+        self.frame = 0
+        self.jump_every = Random(seed).randint(20, 60)
+
+    def keys(self):
+        self.frame += 1
+        pressed = [pygame.K_RIGHT]
+        if self.frame % self.jump_every == 0:
+            pressed.append(pygame.K_SPACE)
+        return Keys(pressed)
+
+
+# mashes random key combinations, holding each for a few frames
+class RandomAgent:
+    choices = (
+        (), (pygame.K_RIGHT,), (pygame.K_LEFT,), (pygame.K_SPACE,),
+        (pygame.K_RIGHT, pygame.K_SPACE), (pygame.K_LEFT, pygame.K_SPACE),
+        (pygame.K_DOWN,), (pygame.K_x,))
+
+    def __init__(self, seed):
+        self.random = Random(seed)
+        self.hold = 0
+        self.current = Keys()
+
+    def keys(self):
+        if self.hold <= 0:
+            self.current = Keys(self.random.choice(self.choices))
+            self.hold = self.random.randint(5, 40)
+        self.hold -= 1
+        return self.current
+
+
+AGENTS = {'right': RunRightAgent, 'random': RandomAgent}
+
+
+# game time for the timers, advanced a fixed step per simulated frame so
+# runs don't depend on how fast (or how loaded) the machine is.
+# starts above 0 since timers treat a start time of 0 as never activated
+class SimulatedClock:
+    def __init__(self):
+        self.ticks = 1000
+
+    def advance(self, ms):
+        self.ticks += ms
+
+    def __call__(self):
+        return self.ticks
+
+
+# per worker state, set up once by init_worker
+worker = {}
+
+def init_worker():
+    # Game sets up the (dummy) display and loads the shared level frames
+    worker['game'] = Game()
+    worker['maps'] = {}
+
+
+def get_map(path):
+    if path not in worker['maps']:
+        tmx_map = load_pygame(path)
+        optimize_tmx(tmx_map)
+        worker['maps'][path] = tmx_map
+    return worker['maps'][path]
+
+
+def get_goal(tmx_map):
+    for obj in tmx_map.get_layer_by_name('Objects'):
+        if obj.name == 'flag':
+            return pygame.FRect(obj.x, obj.y, obj.width, obj.height)
+
+
+def play(job):
+    path, agent_name, seed, max_time = job
+    seed_random(seed)
+    clock = SimulatedClock()
+    set_time_source(clock)
+    # surfaces the level builds belong to this run and are dropped after it
+    surface_registry.begin(job)
+
+    tmx_map = get_map(path)
+    level = Level(tmx_map, worker['game'].level_frames)
+    agent = AGENTS[agent_name](seed)
+    level.player.get_keys = agent.keys
+
+    goal = get_goal(tmx_map)
+    bottom = tmx_map.height * TILE_SIZE
+    dt = 1 / FPS
+
+    # frame times in BUCKET_MS buckets, so a result stays small however long the run
+    histogram = {}
+    frame_stats = {'frames': 0, 'total_ms': 0, 'max_ms': 0}
+    outcome = 'timeout'
+    anchor, anchor_frame = vector(level.player.hitbox.center), 0
+    for frame in range(int(max_time * FPS)):
+        clock.advance(1000 / FPS)
+        start = perf_counter()
+        level.run(dt)
+        frame_ms = (perf_counter() - start) * 1000
+
+        bucket = int(frame_ms / BUCKET_MS)
+        histogram[bucket] = histogram.get(bucket, 0) + 1
+        frame_stats['frames'] += 1
+        frame_stats['total_ms'] += frame_ms
+        frame_stats['max_ms'] = max(frame_stats['max_ms'], frame_ms)
+
+        hitbox = level.player.hitbox
+        if goal and hitbox.colliderect(goal):
+            outcome = 'complete'
+            break
+        # hits are recorded inside the frame, before pearls that hit are removed
+        if hitbox.top > bottom or level.player_hits:
+            outcome = 'death'
+            break
+        if vector(hitbox.center).distance_squared_to(anchor) > STUCK_DISTANCE ** 2:
+            anchor, anchor_frame = vector(hitbox.center), frame
+        elif frame - anchor_frame > STUCK_TIME * FPS:
+            outcome = 'stuck'
+            break
+    surface_registry.release(job)
+
+    return {
+        'level': path,
+        'agent': agent_name,
+        'seed': seed,
+        'outcome': outcome,
+        'time': frame_stats['frames'] / FPS,
+        'frame_stats': frame_stats,
+        'histogram': histogram}
+
+
+def percentile(histogram, frames, percent):
+    target = frames * percent / 100
+    total = 0
+    for bucket in sorted(histogram):
+        total += histogram[bucket]
+        if total >= target:
+            return bucket * BUCKET_MS
+    return 0
+
+
+def summarize(results):
+    report = {}
+    for result in results:
+        level = report.setdefault(basename(result['level']), {
+            'runs': 0,
+            'outcomes': {'complete': 0, 'death': 0, 'stuck': 0, 'timeout': 0},
+            'frames': 0,
+            'total_ms': 0,
+            'max_ms': 0,
+            'histogram': {},
+            'completion_times': []})
+        level['runs'] += 1
+        level['outcomes'][result['outcome']] += 1
+        level['frames'] += result['frame_stats']['frames']
+        level['total_ms'] += result['frame_stats']['total_ms']
+        level['max_ms'] = max(level['max_ms'], result['frame_stats']['max_ms'])
+        for bucket, count in result['histogram'].items():
+            level['histogram'][bucket] = level['histogram'].get(bucket, 0) + count
+        if result['outcome'] == 'complete':
+            level['completion_times'].append(result['time'])
+
+    for level in report.values():
+        frames, histogram = level.pop('frames'), level.pop('histogram')
+        level['frame_ms'] = {
+            'mean': level.pop('total_ms') / max(frames, 1),
+            'p50': percentile(histogram, frames, 50),
+            'p95': percentile(histogram, frames, 95),
+            'p99': percentile(histogram, frames, 99),
+            'max': level.pop('max_ms')}
+    return report
+
+
+def run(levels, agents, runs, max_time, workers):
+    jobs = [(path, agent, seed, max_time)
+        for path in levels
+        for agent in agents
+        for seed in range(runs)]
+
+    results = []
+    with Pool(workers, initializer = init_worker) as pool:
+        for result in pool.imap_unordered(play, jobs, chunksize = max(1, len(jobs) // (workers * 8))):
+            results.append(result)
+    return summarize(results)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description = 'headless level playtesting')
+    parser.add_argument('levels', nargs = '*', default = sorted(glob(join('..', 'data', 'levels', '*.tmx'))))
+    parser.add_argument('--agents', nargs = '+', default = list(AGENTS), choices = list(AGENTS))
+    parser.add_argument('--runs', type = int, default = 10, help = 'runs per level and agent')
+    parser.add_argument('--time', type = float, default = 60, help = 'max simulated seconds per run')
+    parser.add_argument('--workers', type = int, default = os.cpu_count())
+    parser.add_argument('--report', default = 'playtest_report.json')
+    args = parser.parse_args()
+
+    start = perf_counter()
+    report = run(args.levels, args.agents, args.runs, args.time, args.workers)
+    with open(args.report, 'w') as file:
+        json.dump(report, file, indent = 2)
+
+    for name, level in report.items():
+        outcomes = ', '.join(f'{outcome}: {count}' for outcome, count in level['outcomes'].items())
+        print(f"{name}: {level['runs']} runs - {outcomes} - "
+            f"frame ms p50 {level['frame_ms']['p50']:.2f} p95 {level['frame_ms']['p95']:.2f}")
+    print(f'finished in {perf_counter() - start:.1f}s, report written to {args.report}')
@@ -9,17 +9,111 @@
 # imports
 from settings import *
 from math import sin, cos, radians
+from support import flip_surface
+from weakref import WeakValueDictionary
 
 
 # sprite class
 class Sprite(pygame.sprite.Sprite):
     def __init__(self, pos, surface = pygame.Surface((TILE_SIZE, TILE_SIZE)), groups = None, z = Z_LAYERS['main']):
-        super().__init__(groups)
+        super().__init__()
         self.image = surface
         #self.image.fill('white')
         self.rect = self.image.get_frect(topleft=pos)   # floating point rectangle
         self.old_rect = self.rect.copy()
         self.z = z
+        # join the groups last, spatial groups look at the rect when adding
+        if groups is not None:
+            self.add(groups)
+
+
+# membership records are shared: every static sprite in the same set of
+# groups points at one Membership instead of keeping its own dict. records
+# are kept weakly, so they go away with the last sprite using them
+class Membership:
+    __slots__ = ('groups', '__weakref__')
+
+    def __init__(self, groups):
+        self.groups = groups
+
+
+memberships = WeakValueDictionary()
+
+def get_membership(groups):
+    key = tuple(id(group) for group in groups)
+    membership = memberships.get(key)
+    if membership is None:
+        membership = memberships[key] = Membership(groups)
+    return membership
+
+NO_GROUPS = Membership(())
+
+
+# lightweight sprite for tiles and decorations that never move.
+# groups only need add_internal / remove_internal, so this skips
+# pygame.sprite.Sprite (and its per-instance __dict__) entirely
+class StaticSprite:
+    __slots__ = ('image', 'rect', 'z', '_membership')
+
+    def __init__(self, pos, surface, groups = None, z = Z_LAYERS['main']):
+        self.image = surface
+        self.rect = self.image.get_frect(topleft=pos)
+        self.z = z
+        self._membership = NO_GROUPS
+        if groups is not None:
+            self.add(groups)
+
+
+    # never moves, so the previous rect is always the current one
+    @property
+    def old_rect(self):
+        return self.rect
+
+
+    def add(self, *groups):
+        for group in groups:
+            if isinstance(group, pygame.sprite.AbstractGroup):
+                if group not in self._membership.groups:
+                    group.add_internal(self)
+                    self.add_internal(group)
+            else:
+                self.add(*group)
+
+
+    def remove(self, *groups):
+        for group in groups:
+            if isinstance(group, pygame.sprite.AbstractGroup):
+                if group in self._membership.groups:
+                    group.remove_internal(self)
+                    self.remove_internal(group)
+            else:
+                self.remove(*group)
+
+
+    def add_internal(self, group):
+        self._membership = get_membership(self._membership.groups + (group,))
+
+
+    def remove_internal(self, group):
+        self._membership = get_membership(tuple(g for g in self._membership.groups if g is not group))
+
+
+    def kill(self):
+        for group in self._membership.groups:
+            group.remove_internal(self)
+        self._membership = NO_GROUPS
+
+
+    def groups(self):
+        return list(self._membership.groups)
+
+
+    def alive(self):
+        return bool(self._membership.groups)
+
+
+    def update(self, *args, **kwargs):
+        pass
 
 
 class AnimatedSprite(Sprite):
@@ -34,12 +128,32 @@ class AnimatedSprite(Sprite):
         self.image = self.frames[int(self.frame_index % len(self.frames))]
 
 
+    def snapshot(self):
+        return {'frame_index': self.frame_index}
+
+
+    def restore(self, data):
+        self.frame_index = data['frame_index']
+        self.image = self.frames[int(self.frame_index % len(self.frames))]
+
+
     def update(self, dt):
         self.animate(dt)
 
 
 class MovingSprite(AnimatedSprite):
     def __init__(self, frames, groups, start_pos, end_pos, move_dir, speed, flip = False):
+        # full area covered by the movement path, used for spatial lookups
+        start_rect, end_rect = frames[0].get_frect(), frames[0].get_frect()
+        if move_dir == 'x':
+            start_rect.midleft, end_rect.midright = start_pos, end_pos
+        else:
+            start_rect.midtop, end_rect.midbottom = start_pos, end_pos
+        self.path_rect = start_rect.union(end_rect)
+
+        # entities currently standing on this sprite
+        self.riders = set()
+
         super().__init__(start_pos, frames, groups)
 
         if move_dir == 'x':
@@ -79,15 +193,49 @@ class MovingSprite(AnimatedSprite):
             self.reverse['y'] = True if self.direction.y > 0 else False
 
 
+    def attach(self, rider):
+        self.riders.add(rider)
+
+
+    def detach(self, rider):
+        self.riders.discard(rider)
+
+
+    def snapshot(self):
+        return super().snapshot() | {
+            'pos': tuple(self.rect.topleft),
+            'old_pos': tuple(self.old_rect.topleft),
+            'direction': tuple(self.direction),
+            'reverse': dict(self.reverse)}
+
+
+    def restore(self, data):
+        super().restore(data)
+        self.rect.topleft = data['pos']
+        self.old_rect.topleft = data['old_pos']
+        self.direction.update(data['direction'])
+        self.reverse = dict(data['reverse'])
+        # riders attach themselves again on their next contact check
+        self.riders.clear()
+
+
+    def carry_riders(self):
+        offset = vector(self.rect.topleft) - self.old_rect.topleft
+        if offset:
+            for rider in self.riders:
+                rider.ride(offset)
+
+
     def update(self, dt):
         self.old_rect = self.rect.copy()
         self.rect.topleft += self.direction * self.speed * dt
         self.check_border()
+        self.carry_riders()
 
         self.animate(dt)
 
         if self.flip:
-            self.image = pygame.transform.flip(self.image, self.reverse['x'], self.reverse['y']) 
+            self.image = flip_surface(self.image, self.reverse['x'], self.reverse['y'])
 
 
 class Spike(Sprite):
@@ -101,11 +249,26 @@ class Spike(Sprite):
         self.direction = 1
         self.full_circle = True if self.end_angle == -1 else False
 
+        # whole orbit, used for spatial lookups (set before joining any group)
+        self.path_rect = surface.get_frect(center = pos).inflate(radius * 2, radius * 2)
+
         # trigonometry
         y = self.center[1] + sin(radians(self.angle)) * self.radius
         x = self.center[0] + cos(radians(self.angle)) * self.radius
 
         super().__init__((x, y), surface, groups, z)
+        self.rect.center = (x, y)
+
+
+    def snapshot(self):
+        return {'angle': self.angle, 'direction': self.direction}
+
+
+    def restore(self, data):
+        self.angle, self.direction = data['angle'], data['direction']
+        y = self.center[1] + sin(radians(self.angle)) * self.radius
+        x = self.center[0] + cos(radians(self.angle)) * self.radius
+        self.rect.center = (x, y)
 
 
     def update(self, dt):
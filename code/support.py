@@ -13,9 +13,145 @@ from settings import *
 from os import walk
 from os.path import join
 
+# surface formats
+# opaque images blit fastest as plain display surfaces, images whose alpha is
+# only ever fully on or off can use an RLE colorkey, everything else keeps
+# per-pixel alpha
+COLORKEY = (255, 0, 255)
+format_counts = {'opaque': 0, 'colorkey': 0, 'alpha': 0}
+
+def optimize_surface(surface):
+    surface = surface.convert_alpha()
+    width, height = surface.get_size()
+    solid = pygame.mask.from_surface(surface, 254).count()
+    visible = pygame.mask.from_surface(surface, 0).count()
+
+    if solid == width * height:
+        format_counts['opaque'] += 1
+        return surface.convert()
+
+    if solid == visible:
+        keyed = pygame.Surface((width, height)).convert()
+        keyed.fill(COLORKEY)
+        keyed.blit(surface, (0, 0))
+        keyed.set_colorkey(COLORKEY, pygame.RLEACCEL)
+        # art that actually uses the key colour has to keep its alpha
+        if pygame.mask.from_surface(keyed).count() == visible:
+            format_counts['colorkey'] += 1
+            return keyed
+
+    format_counts['alpha'] += 1
+    return surface
+
+
+def optimize_tmx(tmx_map):
+    for index, image in enumerate(tmx_map.images):
+        if image:
+            tmx_map.images[index] = optimize_surface(image)
+
+
+def format_report():
+    return ', '.join(f'{name}: {count}' for name, count in format_counts.items())
+
+
+def load_surface(full_path, alpha = True):
+    surface = pygame.image.load(full_path)
+    return optimize_surface(surface) if alpha else surface.convert()
+
+
+# every surface the game hands out comes from here, keyed by where it was
+# loaded from and how it was transformed (flip / scale), so the same image
+# is only ever resident once. each key remembers which owners (the game or
+# a stage) asked for it, and release() drops whatever an outgoing stage was
+# the last user of
+class SurfaceRegistry:
+    def __init__(self):
+        self.surfaces = {}      # key -> surface
+        self.keys = {}          # surface -> key
+        self.owners = {}        # key -> set of owners
+        self.owner = 'game'
+
+
+    def get(self, key, build):
+        if key not in self.surfaces:
+            surface = build()
+            self.surfaces[key] = surface
+            self.keys[surface] = key
+            self.owners[key] = set()
+        self.owners[key].add(self.owner)
+        return self.surfaces[key]
+
+
+    # surfaces that weren't loaded through the registry (e.g. tmx tiles)
+    # are adopted under their identity
+    def adopt(self, surface, owner = None):
+        if surface not in self.keys:
+            key = (('surface', id(surface)), False, False, None)
+            self.surfaces[key] = surface
+            self.keys[surface] = key
+            self.owners[key] = set()
+        self.owners[self.keys[surface]].add(self.owner if owner is None else owner)
+        return self.keys[surface]
+
+
+    def get_key(self, surface):
+        return self.keys[surface] if surface in self.keys else self.adopt(surface)
+
+
+    def load(self, full_path, alpha = True):
+        return self.get(((full_path, alpha), False, False, None), lambda: load_surface(full_path, alpha))
+
+
+    def flip(self, surface, flip_x, flip_y):
+        source, source_x, source_y, size = self.get_key(surface)
+        key = (source, source_x != flip_x, source_y != flip_y, size)
+        return self.get(key, lambda: pygame.transform.flip(surface, flip_x, flip_y))
+
+
+    def scale(self, surface, size):
+        source, flip_x, flip_y, _ = self.get_key(surface)
+        key = (source, flip_x, flip_y, tuple(size))
+        original = self.surfaces.get((source, flip_x, flip_y, None), surface)
+        return self.get(key, lambda: pygame.transform.scale(original, size))
+
+
+    # drop a single adopted surface early, for caches that evict their own
+    def discard(self, surface):
+        key = self.keys.pop(surface, None)
+        if key is not None:
+            del self.surfaces[key]
+            del self.owners[key]
+            mask_cache.pop(surface, None)
+
+
+    def begin(self, owner):
+        self.owner = owner
+
+
+    def release(self, owner):
+        for key in [key for key, owners in self.owners.items() if owner in owners]:
+            self.owners[key].discard(owner)
+            if not self.owners[key]:
+                surface = self.surfaces.pop(key)
+                del self.keys[surface]
+                del self.owners[key]
+                mask_cache.pop(surface, None)
+
+
+    def resident_bytes(self):
+        return sum(surface.get_pitch() * surface.get_height() for surface in self.surfaces.values())
+
+
+    def report(self):
+        return f'{len(self.surfaces)} surfaces, {self.resident_bytes() / 1024 ** 2:.1f} MB'
+
+
+surface_registry = SurfaceRegistry()
+
+
 def import_image(*path, alpha = True, format = 'png'):
     full_path = join(*path) + f'.{format}'
-    return pygame.image.load(full_path).convert_alpha() if alpha else pygame.image.load(full_path).convert()
+    return surface_registry.load(full_path, alpha)
 
 
 def import_folder(*path):
@@ -23,7 +159,7 @@ def import_folder(*path):
     for folder_path, subfolders, image_names in walk(join(*path)):
         for image_name in sorted(image_names, key = lambda name: int(name.split('.')[0])):
             full_path = join(folder_path, image_name)
-            frames.append(pygame.image.load(full_path).convert_alpha())
+            frames.append(surface_registry.load(full_path))
     return frames
 
 
@@ -32,7 +168,7 @@ def import_folder_dict(*path):
     for folder_path, _, image_names in walk(join(*path)) :
         for image_name in image_names:
             full_path = join(folder_path, image_name)
-            surface = pygame.image.load(full_path).convert_alpha()
+            surface = surface_registry.load(full_path)
             frame_dict[image_name.split('.')[0]] = surface
     return frame_dict
 
@@ -44,3 +180,59 @@ def import_sub_folders(*path):
             for sub_folder in sub_folders:
                 frame_dict[sub_folder] = import_folder(*path, sub_folder)
     return frame_dict
+
+
+# flipped frames come from the registry and collision masks are cached
+# per surface, so neither is rebuilt every frame
+mask_cache = {}
+
+def flip_surface(surface, flip_x, flip_y):
+    if not (flip_x or flip_y):
+        return surface
+    return surface_registry.flip(surface, flip_x, flip_y)
+
+
+def get_mask(surface):
+    if surface not in mask_cache:
+        mask_cache[surface] = pygame.mask.from_surface(surface)
+    return mask_cache[surface]
+
+
+def cache_masks(frames, flip_x = False, flip_y = False):
+    if isinstance(frames, pygame.Surface):
+        get_mask(frames)
+        if flip_x:
+            get_mask(flip_surface(frames, True, False))
+        if flip_y:
+            get_mask(flip_surface(frames, False, True))
+    else:
+        for frame in (frames.values() if isinstance(frames, dict) else frames):
+            cache_masks(frame, flip_x, flip_y)
+    return frames
+
+
+# frames dict that only imports an entry the first time it's used.
+# load_next() lets the game fill in the rest while it's idle
+class LazyFrames(dict):
+    def __init__(self, loaders):
+        super().__init__()
+        self.loaders = loaders
+
+
+    def __missing__(self, key):
+        # imported assets belong to the game, not the stage that asked first
+        owner = surface_registry.owner
+        surface_registry.begin('game')
+        self[key] = self.loaders[key]()
+        surface_registry.begin(owner)
+        return self[key]
+
+
+    def pending(self):
+        return [key for key in self.loaders if key not in self]
+
+
+    def load_next(self):
+        pending = self.pending()
+        if pending:
+            return self[pending[0]]
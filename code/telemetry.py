@@ -0,0 +1,119 @@
+# -----------------------------------------
+#
+# telemetry.py
+#
+# opt-in frame time recording for long sessions
+# keeps a frame time histogram, flags hitches and notes what happened
+# during them (gc runs, sprite bursts, level loads). summaries are written
+# to a rotating log file as one json object per line
+#
+# enable with: python main.py --telemetry
+#
+# Dustin Heyden
+# Oct 19, 2026
+#
+# -----------------------------------------
+
+from time import perf_counter
+from logging.handlers import RotatingFileHandler
+import gc, json, logging
+
+HITCH_MS = 33               # anything slower than 30 fps
+SUMMARY_INTERVAL = 60       # seconds between summaries
+SPRITE_BURST = 20           # sprites created / killed in one frame
+HISTOGRAM_MAX_MS = 100      # 1 ms buckets, the last one catches the rest
+
+
+class Telemetry:
+    def __init__(self):
+        self.enabled = False
+        self.events = []
+
+
+    def enable(self, path = 'telemetry.log', max_bytes = 1024 ** 2, backups = 5):
+        self.enabled = True
+        self.logger = logging.getLogger('telemetry')
+        self.logger.setLevel(logging.INFO)
+        self.logger.propagate = False
+        self.logger.addHandler(RotatingFileHandler(path, maxBytes = max_bytes, backupCount = backups))
+
+        self.session_start = perf_counter()
+        self.sprite_count = None
+        self.gc_start = 0
+        gc.callbacks.append(self.on_gc)
+        self.reset()
+
+
+    def reset(self):
+        self.summary_start = perf_counter()
+        self.histogram = [0] * (HISTOGRAM_MAX_MS + 1)
+        self.frames = 0
+        self.max_ms = 0
+        self.hitches = []
+
+
+    # something worth knowing about happened this frame
+    def note(self, cause):
+        if self.enabled:
+            self.events.append(cause)
+
+
+    def on_gc(self, phase, info):
+        if phase == 'start':
+            self.gc_start = perf_counter()
+        else:
+            pause = (perf_counter() - self.gc_start) * 1000
+            self.events.append(f"gc gen {info['generation']} ({pause:.1f} ms)")
+
+
+    # dt covers the work done since the last call, so the events collected
+    # in the meantime are what to blame for it
+    def end_frame(self, dt, sprite_count):
+        if not self.enabled:
+            return
+
+        if self.sprite_count is not None and abs(sprite_count - self.sprite_count) >= SPRITE_BURST:
+            self.events.append(f'sprite burst ({sprite_count - self.sprite_count:+d})')
+        self.sprite_count = sprite_count
+
+        frame_ms = dt * 1000
+        self.histogram[min(int(frame_ms), HISTOGRAM_MAX_MS)] += 1
+        self.frames += 1
+        self.max_ms = max(self.max_ms, frame_ms)
+        if frame_ms > HITCH_MS:
+            self.hitches.append({
+                'time': round(perf_counter() - self.session_start, 2),
+                'ms': round(frame_ms, 1),
+                'causes': sorted(set(self.events))})
+        self.events.clear()
+
+        if perf_counter() - self.summary_start >= SUMMARY_INTERVAL:
+            self.write_summary()
+
+
+    def percentile(self, percent):
+        target = self.frames * percent / 100
+        total = 0
+        for ms, count in enumerate(self.histogram):
+            total += count
+            if total >= target:
+                return ms
+        return HISTOGRAM_MAX_MS
+
+
+    def write_summary(self):
+        if not self.enabled:
+            return
+        if self.frames:
+            self.logger.info(json.dumps({
+                'session_time': round(perf_counter() - self.session_start, 1),
+                'frames': self.frames,
+                'p50': self.percentile(50),
+                'p95': self.percentile(95),
+                'p99': self.percentile(99),
+                'max': round(self.max_ms, 1),
+                'hitches': self.hitches}, separators = (',', ':')))
+        self.reset()
+
+
+telemetry = Telemetry()
@@ -11,6 +11,15 @@
 
 from pygame.time import get_ticks
 
+# where timers read the time from (ms). headless runs swap in a simulated
+# clock so timers follow game time instead of the wall clock
+time_source = get_ticks
+
+def set_time_source(func):
+    global time_source
+    time_source = func
+
+
 class Timer:
     def __init__(self, duration, func = None, repeat = False):
         self.duration = duration
@@ -22,7 +31,7 @@ class Timer:
 
     def activate(self):
         self.active = True
-        self.start_time = get_ticks()
+        self.start_time = time_source()
 
 
     def deactivate(self):
@@ -32,8 +41,18 @@ class Timer:
             self.activate()
 
 
+    # (active, elapsed ms), independent of when it's restored
+    def snapshot(self):
+        return (self.active, time_source() - self.start_time if self.active else 0)
+
+
+    def restore(self, data):
+        self.active, elapsed = data
+        self.start_time = time_source() - elapsed if self.active else 0
+
+
     def update(self):
-        current_time = get_ticks()
+        current_time = time_source()
         if current_time - self.start_time >= self.duration:
             if self.func and self.start_time != 0:
                 self.func()
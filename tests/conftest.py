@@ -0,0 +1,18 @@
+# -----------------------------------------
+#
+# conftest.py
+#
+# the game modules import each other by name from code/, and the tests
+# run without a window
+#
+# Dustin Heyden
+# Oct 19, 2026
+#
+# -----------------------------------------
+
+import os, sys
+from os.path import join, dirname, abspath
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+sys.path.insert(0, join(dirname(dirname(abspath(__file__))), 'code'))
@@ -0,0 +1,142 @@
+# -----------------------------------------
+#
+# test_collision.py
+#
+# swept movement has to give the same result whatever the frame time:
+# the player and teeth are run through the same scripted scenes at
+# different dt values and have to end up in the same place, without
+# passing through thin floors, platforms or walls on long frames
+#
+# run with: python -m pytest -q
+#
+# Dustin Heyden
+# Oct 19, 2026
+#
+# -----------------------------------------
+
+import pytest
+from settings import *
+from sprites import Sprite
+from groups import PlatformGroup
+from player import Player
+from enemies import Tooth
+import timer
+
+pygame.display.set_mode((1, 1))
+
+DTS = (1 / 240, 1 / 60, 0.1, 0.2, 0.5)
+SECONDS = 4
+THIN = 4
+
+
+class Keys:
+    def __init__(self, pressed = ()):
+        self.pressed = set(pressed)
+
+    def __getitem__(self, key):
+        return key in self.pressed
+
+
+# timers follow the simulated frames instead of the wall clock
+class Clock:
+    def __init__(self):
+        self.ticks = 1000
+
+    def __call__(self):
+        return self.ticks
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(timer, 'time_source', clock)
+    return clock
+
+
+def run(sprite, clock, dt, seconds = SECONDS):
+    for _ in range(round(seconds / dt)):
+        clock.ticks += dt * 1000
+        sprite.update(dt)
+        yield sprite
+
+
+def create_player(collision_sprites, semicollision_sprites, pressed = ()):
+    surface = pygame.Surface((128, 128))
+    states = ('idle', 'run', 'jump', 'fall', 'wall', 'attack', 'air_attack')
+    player = Player(
+        pos = (100, 100),
+        groups = (),
+        collision_sprites = collision_sprites,
+        semicollision_sprites = semicollision_sprites,
+        moving_platforms = PlatformGroup(),
+        frames = {state: [surface] for state in states})
+    player.get_keys = lambda: Keys(pressed)
+    return player
+
+
+def create_scene(floor = False, platform = False, wall = False):
+    collision_sprites = pygame.sprite.Group()
+    semicollision_sprites = pygame.sprite.Group()
+    if floor:
+        Sprite((0, 400), pygame.Surface((1000, THIN)), collision_sprites)
+    if platform:
+        Sprite((0, 400), pygame.Surface((1000, THIN)), semicollision_sprites)
+    if wall:
+        Sprite((600, 0), pygame.Surface((THIN, 400)), collision_sprites)
+    return collision_sprites, semicollision_sprites
+
+
+def resting_position(clock, dt, pressed = (), **scene):
+    player = create_player(*create_scene(**scene), pressed = pressed)
+    for player in run(player, clock, dt):
+        pass
+    return tuple(player.hitbox.topleft), player.on_surface['floor']
+
+
+@pytest.mark.parametrize('dt', DTS)
+def test_lands_on_thin_floor(clock, dt):
+    position, on_floor = resting_position(clock, dt, floor = True)
+    assert position == pytest.approx((138, 400 - 92))
+    assert on_floor
+
+
+@pytest.mark.parametrize('dt', DTS)
+def test_lands_on_thin_platform(clock, dt):
+    position, on_floor = resting_position(clock, dt, platform = True)
+    assert position == pytest.approx((138, 400 - 92))
+    assert on_floor
+
+
+@pytest.mark.parametrize('dt', DTS)
+def test_stops_at_thin_wall(clock, dt):
+    position, on_floor = resting_position(clock, dt, pressed = (pygame.K_RIGHT,), floor = True, wall = True)
+    assert position == pytest.approx((600 - 52, 400 - 92))
+    assert on_floor
+
+
+@pytest.mark.parametrize('scene', (
+    {'floor': True},
+    {'platform': True},
+    {'floor': True, 'wall': True}))
+def test_same_result_for_every_dt(clock, scene):
+    pressed = (pygame.K_RIGHT,) if 'wall' in scene else ()
+    results = [resting_position(clock, dt, pressed = pressed, **scene) for dt in DTS]
+    for position, on_floor in results[1:]:
+        assert position == pytest.approx(results[0][0])
+        assert on_floor == results[0][1]
+
+
+@pytest.mark.parametrize('dt', DTS)
+def test_tooth_turns_at_thin_walls(clock, dt):
+    collision_sprites = pygame.sprite.Group()
+    Sprite((0, 400), pygame.Surface((1000, THIN)), collision_sprites)
+    Sprite((300 - THIN, 0), pygame.Surface((THIN, 400)), collision_sprites)
+    Sprite((700, 0), pygame.Surface((THIN, 400)), collision_sprites)
+
+    tooth = Tooth((480, 360), [pygame.Surface((40, 40))], (), collision_sprites)
+    turns, direction = 0, tooth.direction
+    for tooth in run(tooth, clock, dt):
+        assert 300 <= tooth.rect.left and tooth.rect.right <= 700
+        if tooth.direction != direction:
+            turns, direction = turns + 1, tooth.direction
+    assert turns >= 2
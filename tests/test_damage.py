@@ -0,0 +1,69 @@
+# -----------------------------------------
+#
+# test_damage.py
+#
+# DamageGroup only looks at the grid cells around a rect, plus the free
+# movers. whatever it finds has to match checking every source
+#
+# run with: python -m pytest -q
+#
+# Dustin Heyden
+# Oct 19, 2026
+#
+# -----------------------------------------
+
+from settings import *
+from sprites import AnimatedSprite, MovingSprite, Spike
+from groups import DamageGroup
+
+pygame.display.set_mode((1, 1))
+
+
+class Mover(pygame.sprite.Sprite):
+    def __init__(self, pos, groups):
+        super().__init__(groups)
+        self.image = pygame.Surface((32, 32))
+        self.rect = self.image.get_frect(topleft = pos)
+
+
+def create_sources():
+    damage_sprites = DamageGroup()
+    frames = [pygame.Surface((64, 64))]
+    static = AnimatedSprite((100, 100), frames, damage_sprites)
+    saw = MovingSprite(frames, damage_sprites, (1000, 100), (2000, 100), 'x', 200)
+    spike = Spike((3000, 1000), pygame.Surface((40, 40)), damage_sprites, 300, 60, 0, -1)
+    mover = Mover((5000, 5000), damage_sprites)
+    return damage_sprites, static, saw, spike, mover
+
+
+def brute_force(damage_sprites, rect):
+    return {sprite for sprite in damage_sprites if sprite.rect.colliderect(rect)}
+
+
+def test_finds_each_kind_of_source():
+    damage_sprites, static, saw, spike, mover = create_sources()
+    assert damage_sprites.free == [mover]
+
+    for sprite in (static, saw, spike, mover):
+        assert damage_sprites.collide(sprite.rect.inflate(-8, -8)) == [sprite]
+    assert damage_sprites.collide(pygame.FRect(8000, 8000, 64, 64)) == []
+
+
+def test_matches_brute_force_while_moving():
+    damage_sprites, static, saw, spike, mover = create_sources()
+    probes = [pygame.FRect(x, y, 52, 92) for x in range(0, 6000, 300) for y in range(0, 5400, 300)]
+    for _ in range(240):
+        for sprite in (saw, spike):
+            sprite.update(1 / 30)
+        mover.rect.x -= 20
+        for probe in probes:
+            assert set(damage_sprites.collide(probe)) == brute_force(damage_sprites, probe)
+
+
+def test_killed_sources_leave_the_index():
+    damage_sprites, static, saw, spike, mover = create_sources()
+    static.kill()
+    mover.kill()
+    assert damage_sprites.collide(static.rect) == []
+    assert damage_sprites.collide(mover.rect) == []
+    assert damage_sprites.free == []